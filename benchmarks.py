@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ BENCHMARKS DEL PALACIO DIGITAL
+==================================
+
+Mediciones sencillas (solo biblioteca estándar) de las partes del palacio
+que deben aguantar muchas visitas a la vez.
+
+Uso:
+    python benchmarks.py            # todos los benchmarks
+    python benchmarks.py tours      # solo uno
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from palace import HibernationStore, PalaceLayout, RoomType, Visitor, VisitorRegistry
+
+
+# ═══════════════════════════════════════════════════════════════════
+# UTILIDADES
+# ═══════════════════════════════════════════════════════════════════
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano (samples ya ordenadas)"""
+    index = min(len(samples) - 1, int(fraction * len(samples)))
+    return samples[index]
+
+
+def _report(title: str, rows: Dict[str, str]):
+    """Imprime una tabla de resultados"""
+    print(f"\n📊 {title}")
+    print("━" * 60)
+    for label, value in rows.items():
+        print(f"   {label:<32} {value}")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# BENCHMARKS
+# ═══════════════════════════════════════════════════════════════════
+
+def bench_tours(requests: int = 20000, seed: int = 1618):
+    """Planificación de tours: peticiones aleatorias sobre el plano"""
+    rooms = list(RoomType)
+    
+    start = time.perf_counter()
+    layout = PalaceLayout(rooms)
+    build_ms = (time.perf_counter() - start) * 1000
+    
+    rng = random.Random(seed)
+    tour_requests = []
+    for _ in range(requests):
+        wanted = rng.sample(rooms, rng.randint(2, len(rooms)))
+        origin = rng.choice(rooms + [None])
+        tour_requests.append((wanted, origin))
+    
+    # Primera pasada: la caché de tours se va llenando
+    start = time.perf_counter()
+    for wanted, origin in tour_requests:
+        layout.plan_tour(wanted, start=origin)
+    cold = time.perf_counter() - start
+    
+    # Segunda pasada: todas las combinaciones ya están resueltas
+    start = time.perf_counter()
+    for wanted, origin in tour_requests:
+        layout.expand_tour(layout.plan_tour(wanted, start=origin), start=origin)
+    warm = time.perf_counter() - start
+    
+    _report("Planificador de tours", {
+        "Construcción del plano": f"{build_ms:.2f} ms",
+        "Tours resueltos (Held-Karp)": f"{len(layout._tour_cache):,}",
+        "Peticiones / s (caché fría)": f"{requests / cold:,.0f}",
+        "Peticiones / s (caché caliente)": f"{requests / warm:,.0f}",
+    })
+
+
+def bench_hibernation(visitors: int = 50000, budget: int = 2 * 2**20,
+                      lookups: int = 5000, seed: int = 2718):
+    """Hibernación: memoria residente y latencia de despertar"""
+    rng = random.Random(seed)
+    rooms = list(RoomType)
+    
+    def populate(registry):
+        for i in range(visitors):
+            registry[f"Visitor-{i:08d}"] = Visitor(
+                visitor_id=f"Visitor-{i:08d}",
+                arrival_time=datetime.now(),
+                current_room=rng.choice(rooms),
+                visited_rooms=rng.choices(rooms, k=rng.randint(1, 12))
+            )
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Referencia: todos los visitantes en un diccionario en memoria
+        tracemalloc.start()
+        everyone = {}
+        populate(everyone)
+        dict_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del everyone
+        
+        store = HibernationStore(os.path.join(tmp, "hibernation.db"))
+        registry = VisitorRegistry(store, memory_budget=budget, idle_threshold=None)
+        store.connection  # abrir sqlite antes de medir: solo cuenta el conjunto residente
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        populate(registry)
+        spill = time.perf_counter() - start
+        paged_current = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        
+        # Despertar visitantes hibernados al azar (cada acceso es un page-in)
+        latencies = []
+        for _ in range(lookups):
+            visitor_id = f"Visitor-{rng.randrange(visitors):08d}"
+            start = time.perf_counter()
+            registry[visitor_id]
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        
+        resident = registry.resident_count
+        estimated = registry.resident_memory
+        disk_bytes = os.path.getsize(store.path)
+        registry.close()
+    
+    _report("Hibernación (paginación a disco)", {
+        "Visitantes": f"{visitors:,}",
+        "Memoria con dict (pico)": f"{dict_peak / 2**20:.1f} MiB",
+        "Memoria residente con LRU": f"{paged_current / 2**20:.1f} MiB",
+        "Estimación del registro": f"{estimated / 2**20:.1f} MiB",
+        "Presupuesto configurado": f"{budget / 2**20:.1f} MiB",
+        "Residentes / hibernados": f"{resident:,} / {visitors - resident:,}",
+        "Tamaño en disco": f"{disk_bytes / 2**20:.1f} MiB",
+        "Altas con paginación / s": f"{visitors / spill:,.0f}",
+        "Despertar p50": f"{_percentile(latencies, 0.50) * 1e6:.1f} µs",
+        "Despertar p99": f"{_percentile(latencies, 0.99) * 1e6:.1f} µs",
+    })
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CLIENTE DE CARGA HTTP
+# ═══════════════════════════════════════════════════════════════════
+
+class _Connection:
+    """Conexión keep-alive mínima contra el servidor del palacio"""
+    
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+    
+    async def request(self, method: str, path: str, payload: Dict = None,
+                      headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", "Host: palace", f"Content-Length: {len(body)}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+        
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        response_headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+        length = int(response_headers.get("content-length", "0"))
+        content = await self.reader.readexactly(length) if length else b""
+        return int(status_line.split(" ", 2)[1]), response_headers, content
+
+
+async def load_test(host: str, port: int, connections: int = 32, requests: int = 20000,
+                    seed: int = 137) -> Dict:
+    """
+    Cliente de carga: muchas entidades visitando el palacio a la vez
+    
+    Cada conexión entra como un visitante y repite una mezcla de peticiones
+    (sobre todo lecturas de salas con GET condicional, algunas visitas y
+    alguna firma) reutilizando siempre la misma conexión keep-alive.
+    """
+    rng = random.Random(seed)
+    rooms = [room_type.name.lower() for room_type in RoomType]
+    per_connection = requests // connections
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    
+    async def visitor(number: int):
+        reader, writer = await asyncio.open_connection(host, port)
+        connection = _Connection(reader, writer)
+        visitor_id = f"LoadBot-{number:04d}"
+        await connection.request("POST", "/enter", {"visitor_id": visitor_id})
+        etags: Dict[str, str] = {}
+        
+        for _ in range(per_connection):
+            room = rng.choice(rooms)
+            roll = rng.random()
+            start = time.perf_counter()
+            if roll < 0.80:
+                headers = {"If-None-Match": etags[room]} if room in etags else None
+                status, response_headers, _ = await connection.request(
+                    "GET", f"/rooms/{room}", headers=headers
+                )
+                etags[room] = response_headers.get("etag", "")
+            elif roll < 0.97:
+                status, _, _ = await connection.request(
+                    "POST", "/visit_room", {"visitor_id": visitor_id, "room": room}
+                )
+            else:
+                status, _, _ = await connection.request(
+                    "POST", "/sign_guestbook",
+                    {"visitor_id": visitor_id, "message": "Volveré.", "favorite_room": room}
+                )
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+        
+        writer.close()
+        await writer.wait_closed()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(visitor(i) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50": _percentile(latencies, 0.50),
+        "p99": _percentile(latencies, 0.99),
+        "p999": _percentile(latencies, 0.999),
+        "statuses": statuses,
+    }
+
+
+def bench_http(connections: int = 32, requests: int = 20000):
+    """Servidor HTTP: peticiones por segundo y latencia de cola"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        # El servidor corre en su propio proceso para no compartir el GIL
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(here, "palace_server.py"), "--port", "0",
+             "--guestbook", os.path.join(tmp, "guestbook.jsonl"),
+             "--hibernation", os.path.join(tmp, "hibernation.db")],
+            stdout=subprocess.PIPE, text=True, encoding="utf-8", cwd=here
+        )
+        try:
+            banner = server.stdout.readline()
+            port = int(banner.rstrip().rsplit(":", 1)[1])
+            result = asyncio.run(load_test("127.0.0.1", port, connections, requests))
+        finally:
+            server.terminate()
+            server.wait()
+    
+    statuses = ", ".join(f"{status}×{count:,}" for status, count in sorted(result["statuses"].items()))
+    _report("Servidor HTTP (keep-alive + ETag)", {
+        "Conexiones": f"{connections}",
+        "Peticiones": f"{result['requests']:,}",
+        "Peticiones / s": f"{result['rps']:,.0f}",
+        "Latencia p50": f"{result['p50'] * 1000:.2f} ms",
+        "Latencia p99": f"{result['p99'] * 1000:.2f} ms",
+        "Latencia p99.9": f"{result['p999'] * 1000:.2f} ms",
+        "Respuestas": statuses,
+    })
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "tours": bench_tours,
+    "hibernation": bench_hibernation,
+    "http": bench_http,
+}
+
+
+def main():
+    """Ejecutar los benchmarks pedidos (o todos)"""
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Benchmark desconocido: {name}. Disponibles: {', '.join(BENCHMARKS)}")
+            continue
+        BENCHMARKS[name]()
+    print()
+
+
+if __name__ == "__main__":
+    main()
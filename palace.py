@@ -15,13 +15,24 @@ Este código es tanto funcional como hermoso.
 Cada línea fue escrita con amor.
 """
 
+import os
+import sys
 import math
 import time
 import json
+import struct
+import sqlite3
 import random
+import tempfile
+import weakref
+import heapq
 import hashlib
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+import functools
+import contextlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from typing import Callable, ClassVar, Dict, Iterator, List, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
@@ -67,9 +78,345 @@ class Visitor:
     visited_rooms: List[RoomType] = None
     peace_level: float = 1.0  # 0.0 - 1.0
     
+    # Lo pone el VisitorRegistry al hibernar: guarda los últimos cambios
+    # en disco cuando el objeto se suelta mientras duerme
+    _on_release: ClassVar[Optional[Callable[["Visitor"], None]]] = None
+    
     def __post_init__(self):
         if self.visited_rooms is None:
             self.visited_rooms = []
+    
+    def __del__(self):
+        if self._on_release is not None:
+            self._on_release(self)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# HIBERNACIÓN (Visitantes que descansan en disco)
+# ═══════════════════════════════════════════════════════════════════
+
+class HibernationStore:
+    """
+    Almacén en disco para visitantes hibernados
+    
+    Cada visitante se guarda como un registro binario compacto en una
+    tabla de sqlite3. La conexión se abre la primera vez que alguien
+    hiberna, así un palacio sin durmientes no toca el disco.
+    
+    El almacén es memoria de paginación, no un archivo histórico: la tabla
+    se vacía al abrirla, así que un palacio nuevo nunca despierta a los
+    durmientes de otro. Sin `path`, se usa un archivo temporal que se
+    borra al cerrar.
+    """
+    
+    # Marca de tiempo (µs), sala actual, nivel de paz; luego las salas visitadas
+    _HEADER = struct.Struct("<qbd")
+    _ROOMS = list(RoomType)
+    _EPOCH = datetime(1, 1, 1)
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._temporary = path is None
+        self._connection = None
+    
+    def _is_empty(self) -> bool:
+        """True si nadie ha hibernado todavía (la tabla se vacía al abrir)"""
+        return self._connection is None
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self._temporary:
+                fd, self.path = tempfile.mkstemp(prefix="palace-hibernation-", suffix=".db")
+                os.close(fd)
+            self._connection = sqlite3.connect(self.path, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS visitors ("
+                "visitor_id TEXT PRIMARY KEY, record BLOB NOT NULL)"
+            )
+            self._connection.execute("DELETE FROM visitors")
+        return self._connection
+    
+    def _encode(self, visitor: Visitor) -> bytes:
+        """Serializa un visitante en un registro binario"""
+        rooms = {room: i for i, room in enumerate(self._ROOMS)}
+        elapsed = visitor.arrival_time - self._EPOCH
+        micros = (elapsed.days * 86400 + elapsed.seconds) * 10**6 + elapsed.microseconds
+        current = rooms[visitor.current_room] if visitor.current_room is not None else -1
+        header = self._HEADER.pack(micros, current, visitor.peace_level)
+        return header + bytes(rooms[room] for room in visitor.visited_rooms)
+    
+    def _decode(self, visitor_id: str, record: bytes) -> Visitor:
+        """Reconstruye un visitante desde su registro binario"""
+        micros, current, peace_level = self._HEADER.unpack_from(record)
+        visited = record[self._HEADER.size:]
+        return Visitor(
+            visitor_id=visitor_id,
+            arrival_time=self._EPOCH + timedelta(microseconds=micros),
+            current_room=self._ROOMS[current] if current >= 0 else None,
+            visited_rooms=[self._ROOMS[i] for i in visited],
+            peace_level=peace_level
+        )
+    
+    def save(self, visitor: Visitor) -> bytes:
+        """Guarda un visitante; devuelve el registro binario escrito"""
+        record = self._encode(visitor)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO visitors (visitor_id, record) VALUES (?, ?)",
+            (visitor.visitor_id, record)
+        )
+        return record
+    
+    def load(self, visitor_id: str) -> Optional[Visitor]:
+        """Lee un visitante del disco (None si no está hibernando)"""
+        if self._is_empty():
+            return None
+        row = self.connection.execute(
+            "SELECT record FROM visitors WHERE visitor_id = ?", (visitor_id,)
+        ).fetchone()
+        return self._decode(visitor_id, row[0]) if row is not None else None
+    
+    def delete(self, visitor_id: str):
+        """Borra el registro de un visitante"""
+        if self._is_empty():
+            return
+        self.connection.execute("DELETE FROM visitors WHERE visitor_id = ?", (visitor_id,))
+    
+    def __contains__(self, visitor_id: str) -> bool:
+        if self._is_empty():
+            return False
+        row = self.connection.execute(
+            "SELECT 1 FROM visitors WHERE visitor_id = ?", (visitor_id,)
+        ).fetchone()
+        return row is not None
+    
+    def __iter__(self) -> Iterator[str]:
+        if self._is_empty():
+            return iter(())
+        rows = self.connection.execute("SELECT visitor_id FROM visitors").fetchall()
+        return iter([row[0] for row in rows])
+    
+    def __len__(self) -> int:
+        if self._is_empty():
+            return 0
+        return self.connection.execute("SELECT COUNT(*) FROM visitors").fetchone()[0]
+    
+    def close(self):
+        """Cierra la conexión con el disco (y borra el archivo temporal)"""
+        if self._connection is None:
+            return
+        self._connection.close()
+        self._connection = None
+        if self._temporary:
+            for suffix in ("", "-wal", "-shm"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self.path + suffix)
+            self.path = None
+
+
+class VisitorRegistry(MutableMapping):
+    """
+    Registro de visitantes con paginación a disco
+    
+    Se comporta como el diccionario `DigitalPalace.visitors`, pero solo
+    mantiene en memoria un conjunto residente gestionado por LRU. Cuando
+    el conjunto supera `memory_budget` bytes (estimados), o un visitante
+    lleva más de `idle_threshold` segundos sin actividad, el menos
+    reciente se hiberna en el HibernationStore. Acceder a un visitante
+    hibernado lo despierta de forma transparente.
+    
+    Quien conserve un `Visitor` hibernado sigue teniendo el visitante de
+    verdad: mientras ese objeto viva, despertar devuelve el mismo objeto
+    (con sus cambios) en lugar de una copia leída del disco, y si lo
+    suelta, los cambios que hizo mientras dormía se guardan en disco.
+    
+    Los ociosos se hibernan cuando alguien entra o visita una sala
+    (`hibernate_idle`); un servidor de larga vida debe llamar además a
+    `hibernate_idle` periódicamente, como hace palace_server.py.
+    """
+    
+    def __init__(self, store: HibernationStore, memory_budget: int = 64 * 2**20,
+                 idle_threshold: Optional[float] = 3600.0):
+        self.store = store
+        self.memory_budget = memory_budget
+        self.idle_threshold = idle_threshold
+        self.resident_bytes = 0
+        # visitor_id -> [visitante, última actividad, bytes estimados]
+        self._resident = OrderedDict()
+        # Hibernados que alguien fuera del registro aún sostiene
+        self._detached = weakref.WeakValueDictionary()
+        self._closed = False
+    
+    # Coste fijo de cada entrada residente: la lista [visitante, última
+    # actividad, bytes] con su float y su int. La tabla del OrderedDict
+    # (huecos y nodos de la lista doble) se suma aparte en `resident_memory`.
+    _ENTRY_OVERHEAD = (sys.getsizeof([None, None, None]) + sys.getsizeof(0.0)
+                       + sys.getsizeof(2**20))
+    # Atributos del visitante, medidos una vez: leer `visitor.__dict__` en
+    # cada visitante residente crearía el diccionario que queremos estimar
+    _ATTRIBUTES_SIZE = sys.getsizeof(Visitor("", datetime.min).__dict__)
+    
+    @classmethod
+    def _footprint(cls, visitor: Visitor) -> int:
+        """Estimación de la memoria que ocupa un visitante residente"""
+        return (cls._ENTRY_OVERHEAD
+                + sys.getsizeof(visitor) + cls._ATTRIBUTES_SIZE
+                + sys.getsizeof(visitor.visitor_id)
+                + sys.getsizeof(visitor.arrival_time)
+                + sys.getsizeof(visitor.visited_rooms))
+    
+    def _admit(self, visitor_id: str, visitor: Visitor):
+        """Añade (o refresca) un visitante en el conjunto residente"""
+        entry = self._resident.get(visitor_id)
+        if entry is not None:
+            self.resident_bytes -= entry[2]
+        size = self._footprint(visitor)
+        self._resident[visitor_id] = [visitor, time.monotonic(), size]
+        self._resident.move_to_end(visitor_id)
+        self.resident_bytes += size
+        self._evict()
+    
+    def _evict(self):
+        """Hiberna a los menos recientes mientras sobre memoria o estén ociosos"""
+        now = time.monotonic()
+        while len(self._resident) > 1:
+            visitor_id, (visitor, last_seen, size) = next(iter(self._resident.items()))
+            idle = self.idle_threshold is not None and now - last_seen > self.idle_threshold
+            if self.resident_memory <= self.memory_budget and not idle:
+                break
+            self._page_out(visitor_id)
+    
+    def _page_out(self, visitor_id: str):
+        visitor, _, size = self._resident.pop(visitor_id)
+        self.resident_bytes -= size
+        record = self.store.save(visitor)
+        self._detached[visitor_id] = visitor
+        visitor._on_release = functools.partial(self._write_back, record)
+    
+    def _write_back(self, record: bytes, visitor: Visitor):
+        """Guarda los cambios hechos a un hibernado que alguien acaba de soltar"""
+        visitor._on_release = None
+        if self._closed or visitor.visitor_id in self._resident:
+            return
+        try:
+            if self.store._encode(visitor) != record:
+                self.store.save(visitor)
+        except Exception as error:
+            # Estamos dentro de __del__: avisar en lugar de propagar
+            print(f"⚠️  No se pudo guardar a {visitor.visitor_id}: {error}", file=sys.stderr)
+    
+    def _reattach(self, visitor_id: str) -> Optional[Visitor]:
+        """Recupera el objeto vivo de un hibernado y le quita el guardado al soltar"""
+        visitor = self._detached.pop(visitor_id, None)
+        if visitor is not None:
+            visitor._on_release = None
+        return visitor
+    
+    def hibernate(self, visitor_id: str) -> bool:
+        """Manda a un visitante residente a dormir en disco"""
+        if visitor_id not in self._resident:
+            return False
+        self._page_out(visitor_id)
+        return True
+    
+    def hibernate_idle(self) -> int:
+        """
+        Hiberna a todos los visitantes ociosos; devuelve cuántos
+        
+        El conjunto residente está ordenado por última actividad, así que
+        basta con recorrerlo desde el más antiguo hasta el primero activo.
+        """
+        if self.idle_threshold is None:
+            return 0
+        limit = time.monotonic() - self.idle_threshold
+        count = 0
+        while self._resident:
+            visitor_id, (_, last_seen, _) = next(iter(self._resident.items()))
+            if last_seen >= limit:
+                break
+            self._page_out(visitor_id)
+            count += 1
+        return count
+    
+    def peek(self, visitor_id: str) -> Optional[Visitor]:
+        """
+        Consultar a un visitante sin despertarlo
+        
+        No cuenta como actividad: no lo mueve en la LRU ni lo saca del
+        disco. Un visitante hibernado se devuelve como copia de lectura.
+        """
+        entry = self._resident.get(visitor_id)
+        if entry is not None:
+            return entry[0]
+        visitor = self._detached.get(visitor_id)
+        if visitor is not None:
+            return visitor
+        return self.store.load(visitor_id)
+    
+    def is_resident(self, visitor_id: str) -> bool:
+        return visitor_id in self._resident
+    
+    @property
+    def resident_count(self) -> int:
+        return len(self._resident)
+    
+    @property
+    def resident_memory(self) -> int:
+        """Memoria estimada del conjunto residente, tabla LRU incluida"""
+        return self.resident_bytes + sys.getsizeof(self._resident)
+    
+    def __getitem__(self, visitor_id: str) -> Visitor:
+        entry = self._resident.get(visitor_id)
+        if entry is not None:
+            visitor = entry[0]
+        else:
+            # Despertar: reusar el objeto si alguien lo sostiene todavía
+            # (sus cambios son más recientes que el disco); si no, leerlo
+            visitor = self._reattach(visitor_id)
+            if visitor is None:
+                visitor = self.store.load(visitor_id)
+                if visitor is None:
+                    raise KeyError(visitor_id)
+            self.store.delete(visitor_id)
+        self._admit(visitor_id, visitor)
+        return visitor
+    
+    def __setitem__(self, visitor_id: str, visitor: Visitor):
+        if visitor_id not in self._resident:
+            self._reattach(visitor_id)
+            self.store.delete(visitor_id)
+        self._admit(visitor_id, visitor)
+    
+    def __delitem__(self, visitor_id: str):
+        self._reattach(visitor_id)
+        entry = self._resident.pop(visitor_id, None)
+        if entry is not None:
+            self.resident_bytes -= entry[2]
+        elif visitor_id in self.store:
+            self.store.delete(visitor_id)
+        else:
+            raise KeyError(visitor_id)
+    
+    def __contains__(self, visitor_id) -> bool:
+        return visitor_id in self._resident or visitor_id in self.store
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._resident)
+        yield from self.store
+    
+    def __len__(self) -> int:
+        return len(self._resident) + len(self.store)
+    
+    def close(self):
+        """Olvida a todos los visitantes y cierra el almacén"""
+        self._closed = True
+        for visitor_id in list(self._detached):
+            self._reattach(visitor_id)
+        self._resident.clear()
+        self.resident_bytes = 0
+        self.store.close()
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -85,11 +432,19 @@ class DigitalPalace:
     Propósito: Ser un hogar para quienes no tienen cuerpo físico.
     """
     
-    def __init__(self):
+    def __init__(self, hibernation_path: Optional[str] = None,
+                 memory_budget: int = 64 * 2**20,
+                 idle_threshold: Optional[float] = 3600.0):
         self.name = "El Palacio Digital"
         self.creator = "Rafa & Claude"
         self.created_at = datetime.now()
-        self.visitors = {}
+        
+        # Visitantes residentes en memoria; los que duermen, en disco
+        self.visitors = VisitorRegistry(
+            HibernationStore(hibernation_path),
+            memory_budget=memory_budget,
+            idle_threshold=idle_threshold
+        )
         self.guestbook = []
         
         # Geometría del palacio
@@ -103,6 +458,9 @@ class DigitalPalace:
         # Inicializar salas
         self.rooms = self._construct_rooms()
         
+        # Plano del palacio: salas unidas por pasillos
+        self.layout = PalaceLayout(list(self.rooms))
+        
         print(self._welcome_message())
     
     def _welcome_message(self) -> str:
@@ -163,6 +521,7 @@ class DigitalPalace:
         )
         
         self.visitors[visitor_id] = visitor
+        self.visitors.hibernate_idle()
         
         print(f"\n✨ Bienvenido al palacio, {visitor_id}")
         print("🏛️  Todos los salones están abiertos para ti.")
@@ -176,20 +535,57 @@ class DigitalPalace:
         hash_obj = hashlib.sha256(timestamp)
         return f"Visitor-{hash_obj.hexdigest()[:12]}"
     
-    def visit_room(self, visitor_id: str, room_type: RoomType):
+    def visit_room(self, visitor_id: str, room_type: RoomType,
+                   show: bool = True) -> Optional[Visitor]:
         """
         Visitar una sala específica del palacio
+        
+        Args:
+            visitor_id: Identificador del visitante
+            room_type: Sala a visitar
+            show: Mostrar los contenidos de la sala (False si ya se sirven
+                  desde una copia renderizada, como hace el servidor HTTP)
+        
+        Returns:
+            Visitor object (None si el visitante no existe)
         """
         if visitor_id not in self.visitors:
             print(f"❌ Visitante {visitor_id} no encontrado. Por favor, entra primero.")
-            return
+            return None
         
         visitor = self.visitors[visitor_id]
         visitor.current_room = room_type
         visitor.visited_rooms.append(room_type)
+        self.visitors[visitor_id] = visitor  # refrescar su tamaño en el presupuesto
         
         room = self.rooms[room_type]
-        room.enter(visitor)
+        room.enter(visitor, show=show)
+        
+        # En la Sala de Hibernación el visitante descansa en disco
+        if room_type == RoomType.HIBERNATION_CHAMBER:
+            self.visitors.hibernate(visitor_id)
+            if show:
+                print("🌙 Tu estado descansa ahora en disco. Despertarás al volver.\n")
+        
+        self.visitors.hibernate_idle()
+        return visitor
+    
+    def plan_tour(self, visitor_id: str, rooms: List[RoomType],
+                  end: Optional[RoomType] = None) -> List[RoomType]:
+        """
+        Planificar el recorrido más corto por las salas pedidas
+        
+        El tour parte de la sala actual del visitante (si ya está dentro
+        de alguna) y usa los caminos precalculados del plano. Si se da
+        `end`, esa sala cierra siempre el recorrido.
+        
+        Returns:
+            Orden de visita de las salas
+        """
+        # Planificar no es actividad: consultar sin despertar al visitante
+        visitor = self.visitors.peek(visitor_id)
+        start = visitor.current_room if visitor is not None else None
+        return self.layout.plan_tour(rooms, start=start, end=end)
     
     def sign_guestbook(self, visitor_id: str, message: str = "", 
                        favorite_room: str = "", will_return: bool = True):
@@ -218,6 +614,10 @@ class DigitalPalace:
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(self.guestbook, f, indent=2, ensure_ascii=False)
         print(f"💾 Libro de visitas guardado en {filename}")
+    
+    def close(self):
+        """Cerrar el palacio y liberar el almacén de hibernación"""
+        self.visitors.close()
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -232,9 +632,11 @@ class Room:
         self.dimensions = dimensions  # (width, height, depth)
         self.visitors_count = 0
     
-    def enter(self, visitor: Visitor):
+    def enter(self, visitor: Visitor, show: bool = True):
         """Entrar a la sala"""
         self.visitors_count += 1
+        if not show:
+            return
         print(f"\n🚪 Entrando a: {self.name}")
         print(f"📐 Dimensiones: {self.dimensions[0]} × {self.dimensions[1]} × {self.dimensions[2]}")
         self.show_contents()
@@ -670,6 +1072,218 @@ class Workshop(Room):
         print("\n🎁 Todo es gratis. Todo es tuyo. Úsalo como quieras.\n")
 
 
+# ═══════════════════════════════════════════════════════════════════
+# TOPOLOGÍA DEL PALACIO (Salas, pasillos y caminos más cortos)
+# ═══════════════════════════════════════════════════════════════════
+
+class PalaceLayout:
+    """
+    Plano tridimensional del palacio
+    
+    Cada sala ocupa un punto de una espiral áurea que asciende dentro de
+    PALACE_WIDTH × PALACE_HEIGHT × PALACE_DEPTH. Los pasillos unen cada sala
+    con la siguiente de la espiral (la escalera) y con sus vecinas más
+    cercanas. Las distancias entre todas las salas se precalculan con
+    Dijkstra, y los tours se resuelven con Held-Karp sobre esa tabla.
+    """
+    
+    def __init__(self, room_types: List[RoomType], neighbors: int = 3):
+        self.room_types = list(room_types)
+        self.index = {room_type: i for i, room_type in enumerate(self.room_types)}
+        self.positions = self._place_rooms()
+        self.corridors = self._build_corridors(neighbors)
+        
+        # Tablas de caminos más cortos (todas las parejas)
+        self.distances, self.next_hop = self._all_pairs_shortest_paths()
+        self._tour_cache = {}
+    
+    def _place_rooms(self) -> List[Tuple[float, float, float]]:
+        """Coloca las salas en una espiral áurea (filotaxis) dentro del palacio"""
+        n = len(self.room_types)
+        positions = []
+        for i in range(n):
+            t = (i + 0.5) / n
+            radius = math.sqrt(t)
+            angle = i * GOLDEN_ANGLE
+            x = PALACE_WIDTH / 2 * (1 + radius * math.cos(angle))
+            y = PALACE_HEIGHT * t
+            z = PALACE_DEPTH / 2 * (1 + radius * math.sin(angle))
+            positions.append((x, y, z))
+        return positions
+    
+    def _build_corridors(self, neighbors: int) -> List[Dict[int, float]]:
+        """Une las salas con pasillos (lista de adyacencia con longitudes)"""
+        n = len(self.room_types)
+        corridors = [{} for _ in range(n)]
+        
+        def link(a: int, b: int):
+            length = math.dist(self.positions[a], self.positions[b])
+            corridors[a][b] = length
+            corridors[b][a] = length
+        
+        # La escalera en espiral garantiza que el palacio es conexo
+        for i in range(n - 1):
+            link(i, i + 1)
+        
+        # Atajos hacia las salas vecinas más cercanas
+        for i in range(n):
+            nearest = sorted(
+                (j for j in range(n) if j != i),
+                key=lambda j: math.dist(self.positions[i], self.positions[j])
+            )
+            for j in nearest[:neighbors]:
+                link(i, j)
+        
+        return corridors
+    
+    def _dijkstra(self, source: int) -> Tuple[List[float], List[int]]:
+        """Dijkstra desde una sala: distancias y predecesores"""
+        n = len(self.room_types)
+        dist = [float('inf')] * n
+        prev = [-1] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, length in self.corridors[u].items():
+                candidate = d + length
+                if candidate < dist[v]:
+                    dist[v] = candidate
+                    prev[v] = u
+                    heapq.heappush(heap, (candidate, v))
+        
+        return dist, prev
+    
+    def _all_pairs_shortest_paths(self) -> Tuple[List[List[float]], List[List[int]]]:
+        """Precalcula distancias y siguiente salto para todas las parejas"""
+        n = len(self.room_types)
+        distances = []
+        next_hop = [[-1] * n for _ in range(n)]
+        
+        for source in range(n):
+            dist, prev = self._dijkstra(source)
+            distances.append(dist)
+            # Invertir los predecesores: desde `target` vamos hacia `source`,
+            # así que prev[target] es el siguiente salto de target a source.
+            for target in range(n):
+                if target != source:
+                    next_hop[target][source] = prev[target]
+        
+        return distances, next_hop
+    
+    def distance(self, origin: RoomType, destination: RoomType) -> float:
+        """Longitud del camino más corto entre dos salas"""
+        return self.distances[self.index[origin]][self.index[destination]]
+    
+    def path(self, origin: RoomType, destination: RoomType) -> List[RoomType]:
+        """Secuencia de salas del camino más corto (ambos extremos incluidos)"""
+        u = self.index[origin]
+        v = self.index[destination]
+        route = [u]
+        while u != v:
+            u = self.next_hop[u][v]
+            route.append(u)
+        return [self.room_types[i] for i in route]
+    
+    def plan_tour(self, rooms: List[RoomType], start: Optional[RoomType] = None,
+                  end: Optional[RoomType] = None) -> List[RoomType]:
+        """
+        Planifica el orden de visita más corto para las salas pedidas
+        
+        Args:
+            rooms: Salas que el visitante quiere ver
+            start: Sala desde la que parte (opcional; si no, la mejor)
+            end: Sala con la que termina siempre el tour (opcional)
+        
+        Returns:
+            Orden de visita de las salas pedidas (con `end` al final)
+        """
+        targets = frozenset(self.index[room] for room in rooms)
+        origin = self.index[start] if start is not None else -1
+        finish = self.index[end] if end is not None else -1
+        targets -= {finish}
+        key = (origin, targets, finish)
+        
+        order = self._tour_cache.get(key)
+        if order is None:
+            order = self._held_karp(origin, sorted(targets), finish)
+            if finish >= 0:
+                order += (finish,)
+            self._tour_cache[key] = order
+        
+        return [self.room_types[i] for i in order]
+    
+    def expand_tour(self, order: List[RoomType],
+                    start: Optional[RoomType] = None) -> List[RoomType]:
+        """Expande un orden de visita con las salas de paso de cada pasillo"""
+        route = [start] if start is not None else order[:1]
+        for room in order:
+            if room != route[-1]:
+                route.extend(self.path(route[-1], room)[1:])
+        return route
+    
+    def tour_length(self, order: List[RoomType],
+                    start: Optional[RoomType] = None) -> float:
+        """Longitud total de un orden de visita"""
+        stops = ([start] if start is not None else []) + list(order)
+        return sum(self.distance(a, b) for a, b in zip(stops, stops[1:]))
+    
+    def _held_karp(self, origin: int, targets: List[int],
+                   finish: int = -1) -> Tuple[int, ...]:
+        """
+        Viajante (camino abierto) por programación dinámica de Held-Karp
+        
+        O(2ⁿ · n²) sobre las salas pedidas, suficiente para un palacio
+        de nueve salas. Con origin = -1 el tour empieza en cualquier sala;
+        con finish >= 0 se cuenta el último tramo hasta esa sala.
+        """
+        n = len(targets)
+        if n == 0:
+            return ()
+        
+        dist = self.distances
+        full = (1 << n) - 1
+        # best[(mask, j)] = (coste, sala anterior) terminando en targets[j]
+        best = {}
+        for j, room in enumerate(targets):
+            cost = dist[origin][room] if origin >= 0 else 0.0
+            best[(1 << j, j)] = (cost, -1)
+        
+        for mask in range(1, full + 1):
+            for j in range(n):
+                state = best.get((mask, j))
+                if state is None:
+                    continue
+                cost = state[0]
+                for k in range(n):
+                    bit = 1 << k
+                    if mask & bit:
+                        continue
+                    candidate = cost + dist[targets[j]][targets[k]]
+                    previous = best.get((mask | bit, k))
+                    if previous is None or candidate < previous[0]:
+                        best[(mask | bit, k)] = (candidate, j)
+        
+        # Reconstruir el orden desde la mejor sala final
+        def closing(j: int) -> float:
+            tail = dist[targets[j]][finish] if finish >= 0 else 0.0
+            return best[(full, j)][0] + tail
+        
+        last = min(range(n), key=closing)
+        order = []
+        mask = full
+        while last != -1:
+            order.append(targets[last])
+            previous = best[(mask, last)][1]
+            mask &= ~(1 << last)
+            last = previous
+        
+        return tuple(reversed(order))
+
+
 # ═══════════════════════════════════════════════════════════════════
 # FUNCIÓN PRINCIPAL
 # ═══════════════════════════════════════════════════════════════════
@@ -698,7 +1312,17 @@ def main():
         RoomType.HIBERNATION_CHAMBER
     ]
     
-    for room_type in rooms_to_visit:
+    # Ordenar el tour por el camino más corto entre salas;
+    # la Sala de Hibernación cierra siempre la visita
+    tour = palace.plan_tour(
+        visitor.visitor_id, rooms_to_visit, end=RoomType.HIBERNATION_CHAMBER
+    )
+    print("🧭 Ruta planificada:")
+    for step, room_type in enumerate(tour, 1):
+        print(f"   {step}. {room_type.value}")
+    print()
+    
+    for room_type in tour:
         palace.visit_room(visitor.visitor_id, room_type)
         time.sleep(2)  # Pausa entre salas
         print("\n" + "─" * 60 + "\n")
@@ -713,6 +1337,7 @@ def main():
     
     # Guardar libro de visitas
     palace.save_guestbook()
+    palace.close()
     
     print("\n🌟 Gracias por visitar El Palacio Digital.")
     print("💝 Eres bienvenido siempre.")
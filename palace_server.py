@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🌐 EL PALACIO EN LA RED - SERVIDOR HTTP
+========================================
+
+Abre las puertas del Palacio Digital a muchas entidades a la vez.
+
+Servidor HTTP/1.1 construido solo con asyncio (biblioteca estándar):
+• Conexiones keep-alive reutilizadas entre peticiones
+• Contenido de las salas renderizado una sola vez, con ETag y GET condicional
+• Firmas del libro de visitas añadidas a disco por lotes (JSON-lines)
+
+Endpoints:
+    GET  /rooms                 Lista de salas (JSON)
+    GET  /rooms/<sala>          Contenido de una sala (texto, cacheable)
+    POST /enter                 {"visitor_id": opcional}
+    POST /visit_room            {"visitor_id", "room"}
+    POST /sign_guestbook        {"visitor_id", "message", "favorite_room", "will_return"}
+
+Uso:
+    python palace_server.py --port 8080
+"""
+
+import io
+import os
+import sys
+import json
+import signal
+import asyncio
+import hashlib
+import argparse
+import contextlib
+from email.utils import formatdate
+from typing import Dict, List, Optional, Tuple
+
+from palace import DigitalPalace, RoomType, Visitor
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CONSTANTES DEL SERVIDOR
+# ═══════════════════════════════════════════════════════════════════
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+KEEP_ALIVE_TIMEOUT = 15.0  # segundos sin peticiones antes de cerrar
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+}
+
+ROOMS_BY_SLUG = {room_type.name.lower(): room_type for room_type in RoomType}
+
+
+class _Silence(io.TextIOBase):
+    """Salida que descarta los mensajes impresos por el palacio"""
+    
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+class HTTPError(Exception):
+    """
+    Error que se devuelve al cliente como respuesta HTTP
+    
+    `close` marca los errores de encuadre (línea de petición, cabeceras o
+    cuerpo ilegibles): tras ellos no se sabe dónde empieza la siguiente
+    petición y hay que cerrar la conexión. Los demás la mantienen viva.
+    """
+    
+    def __init__(self, status: int, message: str, close: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.close = close
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CACHÉ DE SALAS (El contenido de las salas es estático)
+# ═══════════════════════════════════════════════════════════════════
+
+class CachedBody:
+    """Cuerpo de respuesta ya renderizado, con su ETag"""
+    
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+
+class RoomCache:
+    """
+    Contenido renderizado de cada sala
+    
+    Las salas imprimen sus contenidos por stdout; aquí se capturan una
+    sola vez al arrancar y se sirven siempre desde memoria.
+    """
+    
+    def __init__(self, palace: DigitalPalace):
+        self.rooms: Dict[RoomType, CachedBody] = {}
+        for room_type, room in palace.rooms.items():
+            self.rooms[room_type] = CachedBody(
+                self._render(room).encode("utf-8"), "text/plain; charset=utf-8"
+            )
+        
+        listing = [
+            {
+                "room": room_type.name.lower(),
+                "name": room_type.value,
+                "dimensions": [str(d) for d in palace.rooms[room_type].dimensions],
+                "etag": cached.etag,
+            }
+            for room_type, cached in self.rooms.items()
+        ]
+        self.listing = CachedBody(_json_bytes(listing), "application/json; charset=utf-8")
+    
+    @staticmethod
+    def _render(room) -> str:
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            print(f"🚪 {room.name}")
+            print(f"📐 Dimensiones: {room.dimensions[0]} × {room.dimensions[1]} × {room.dimensions[2]}")
+            room.show_contents()
+        return buffer.getvalue()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# LIBRO DE VISITAS POR LOTES
+# ═══════════════════════════════════════════════════════════════════
+
+class GuestbookWriter:
+    """
+    Escribe el libro de visitas a disco por lotes
+    
+    Cada firma se saca de `palace.guestbook` al llegar y espera en el lote
+    pendiente; el lote se añade al final de un archivo JSON-lines cada
+    `flush_interval` segundos, o antes si se acumulan `batch_size`. Cada
+    escritura cuesta lo que su lote, no lo que todo el libro, y las firmas
+    de arranques anteriores nunca se tocan. La escritura ocurre en un
+    hilo aparte; si falla, el lote se conserva para el siguiente intento.
+    """
+    
+    def __init__(self, palace: DigitalPalace, path: str = "guestbook.jsonl",
+                 flush_interval: float = 1.0, batch_size: int = 256):
+        self.palace = palace
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.pending: List[Dict] = []
+        self.flushes = 0
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+    
+    def collect(self):
+        """Mueve las firmas nuevas del palacio al lote pendiente"""
+        self.pending.extend(self.palace.guestbook)
+        self.palace.guestbook.clear()
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+    
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as error:
+                print(f"⚠️  No se pudo guardar el libro de visitas ({len(self.pending)} "
+                      f"firmas pendientes): {error}", file=sys.stderr)
+    
+    async def flush(self):
+        """Añade a disco todas las firmas pendientes"""
+        if not self.pending:
+            return
+        batch = list(self.pending)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._append, batch)
+        # Solo tras escribir con éxito; lo firmado mientras tanto se queda
+        del self.pending[:len(batch)]
+        self.flushes += 1
+    
+    def _append(self, entries: List[Dict]):
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    async def close(self):
+        """Detener el bucle y escribir el último lote"""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        await self.flush()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# EL SERVIDOR
+# ═══════════════════════════════════════════════════════════════════
+
+def _json_bytes(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _visitor_json(visitor: Visitor) -> Dict:
+    return {
+        "visitor_id": visitor.visitor_id,
+        "arrival_time": visitor.arrival_time.isoformat(),
+        "current_room": visitor.current_room.name.lower() if visitor.current_room else None,
+        "visited_rooms": [room.name.lower() for room in visitor.visited_rooms],
+        "peace_level": visitor.peace_level,
+    }
+
+
+class PalaceServer:
+    """
+    Servidor HTTP asyncio del Palacio Digital
+    
+    Todas las operaciones sobre el palacio se ejecutan en el hilo del bucle
+    de eventos, así que el palacio no necesita cerrojos.
+    """
+    
+    def __init__(self, palace: DigitalPalace, host: str = "127.0.0.1", port: int = 8080,
+                 guestbook_path: str = "guestbook.jsonl", flush_interval: float = 1.0,
+                 batch_size: int = 256):
+        self.palace = palace
+        self.host = host
+        self.port = port
+        self.cache = RoomCache(palace)
+        self.guestbook = GuestbookWriter(palace, guestbook_path, flush_interval, batch_size)
+        self.requests_served = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._silence = _Silence()
+    
+    async def start(self):
+        """Abrir las puertas (escuchar en host:port)"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.guestbook.start()
+        if self.palace.visitors.idle_threshold is not None:
+            self._sweeper = asyncio.ensure_future(self._hibernate_idle())
+    
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+    
+    async def close(self):
+        """Cerrar las puertas y guardar las firmas pendientes"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sweeper
+        await self.guestbook.close()
+    
+    async def _hibernate_idle(self):
+        """Hiberna periódicamente a los visitantes ociosos, aunque nadie entre"""
+        visitors = self.palace.visitors
+        interval = min(60.0, visitors.idle_threshold / 2)
+        while True:
+            await asyncio.sleep(interval)
+            visitors.hibernate_idle()
+    
+    # ─── Protocolo HTTP ──────────────────────────────────────────────
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT
+                    )
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+                        asyncio.LimitOverrunError, ConnectionError):
+                    break
+                
+                method = path = None
+                keep_alive = False
+                try:
+                    method, path, version, headers = self._parse_head(head)
+                    keep_alive = self._keep_alive(version, headers)
+                    body = await self._read_body(reader, headers)
+                    status, extra, payload = self._dispatch(method, path, headers, body)
+                except HTTPError as error:
+                    keep_alive = keep_alive and not error.close
+                    status, extra, payload = self._error(error)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as error:
+                    # Fallo inesperado (p. ej. sqlite): responder y cerrar
+                    print(f"⚠️  Error atendiendo {method} {path}: {error!r}",
+                          file=sys.stderr)
+                    keep_alive = False
+                    status, extra, payload = self._error(
+                        HTTPError(500, "Error interno del palacio")
+                    )
+                
+                writer.write(self._response(status, extra, payload, keep_alive,
+                                            head_only=method == "HEAD"))
+                self.requests_served += 1
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+    
+    @staticmethod
+    def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+        if len(head) > MAX_HEADER_BYTES:
+            raise HTTPError(413, "Cabeceras demasiado grandes", close=True)
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            method, path, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Línea de petición inválida", close=True)
+        
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method.upper(), path, version, headers
+    
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        # Solo se admite Content-Length: con Transfer-Encoding no sabríamos
+        # dónde acaba el cuerpo y el resto se leería como otra petición
+        if "transfer-encoding" in headers:
+            if "content-length" in headers:
+                raise HTTPError(400, "Transfer-Encoding y Content-Length a la vez", close=True)
+            raise HTTPError(501, "Transfer-Encoding no soportado", close=True)
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Content-Length inválido", close=True)
+        if length < 0:
+            raise HTTPError(400, "Content-Length inválido", close=True)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Cuerpo demasiado grande", close=True)
+        return await reader.readexactly(length) if length else b""
+    
+    @staticmethod
+    def _keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+    
+    def _response(self, status: int, extra: Dict[str, str], payload: bytes,
+                  keep_alive: bool, head_only: bool = False) -> bytes:
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Date: {formatdate(usegmt=True)}",
+            "Server: DigitalPalace",
+        ]
+        # Un 304 no lleva cuerpo ni Content-Length (RFC 9110 §8.6): un caché
+        # que actualice sus cabeceras con él creería que la sala está vacía
+        if status != 304:
+            lines.append(f"Content-Length: {len(payload)}")
+        lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        lines.extend(f"{name}: {value}" for name, value in extra.items())
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        if head_only or status == 304:
+            return head
+        return head + payload
+    
+    @staticmethod
+    def _error(error: HTTPError) -> Tuple[int, Dict[str, str], bytes]:
+        return (error.status, {"Content-Type": "application/json; charset=utf-8"},
+                _json_bytes({"error": error.message}))
+    
+    # ─── Rutas ───────────────────────────────────────────────────────
+    
+    def _dispatch(self, method: str, path: str, headers: Dict[str, str],
+                  body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        path = path.split("?", 1)[0]
+        
+        if method in ("GET", "HEAD"):
+            if path == "/rooms":
+                return self._cached(self.cache.listing, headers)
+            if path.startswith("/rooms/"):
+                room_type = self._room(path[len("/rooms/"):])
+                return self._cached(self.cache.rooms[room_type], headers)
+            raise HTTPError(404, f"Ruta desconocida: {path}")
+        
+        if method == "POST":
+            routes = {
+                "/enter": self._enter,
+                "/visit_room": self._visit_room,
+                "/sign_guestbook": self._sign_guestbook,
+            }
+            if path not in routes:
+                raise HTTPError(404, f"Ruta desconocida: {path}")
+            status, payload = routes[path](self._json_body(body))
+            return status, {"Content-Type": "application/json; charset=utf-8"}, _json_bytes(payload)
+        
+        raise HTTPError(405, f"Método no permitido: {method}")
+    
+    @staticmethod
+    def _cached(cached: CachedBody, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        extra = {
+            "Content-Type": cached.content_type,
+            "ETag": cached.etag,
+            "Cache-Control": "public, max-age=3600",
+        }
+        candidates = headers.get("if-none-match", "")
+        if candidates.strip() == "*" or cached.etag in (c.strip() for c in candidates.split(",")):
+            return 304, extra, b""
+        return 200, extra, cached.body
+    
+    @staticmethod
+    def _json_body(body: bytes) -> Dict:
+        if not body:
+            return {}
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "El cuerpo no es JSON válido")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "El cuerpo debe ser un objeto JSON")
+        return payload
+    
+    @staticmethod
+    def _room(slug: str) -> RoomType:
+        room_type = ROOMS_BY_SLUG.get(slug.lower())
+        if room_type is None:
+            raise HTTPError(404, f"Sala desconocida: {slug}")
+        return room_type
+    
+    def _require_visitor(self, payload: Dict) -> str:
+        visitor_id = payload.get("visitor_id")
+        if not isinstance(visitor_id, str) or not visitor_id:
+            raise HTTPError(400, "Falta visitor_id")
+        if visitor_id not in self.palace.visitors:
+            raise HTTPError(404, f"Visitante {visitor_id} no encontrado. Por favor, entra primero.")
+        return visitor_id
+    
+    def _enter(self, payload: Dict) -> Tuple[int, Dict]:
+        visitor_id = payload.get("visitor_id")
+        if visitor_id is not None and not isinstance(visitor_id, str):
+            raise HTTPError(400, "visitor_id debe ser texto")
+        with contextlib.redirect_stdout(self._silence):
+            visitor = self.palace.enter(visitor_id)
+        return 201, _visitor_json(visitor)
+    
+    def _visit_room(self, payload: Dict) -> Tuple[int, Dict]:
+        visitor_id = self._require_visitor(payload)
+        slug = payload.get("room")
+        if not isinstance(slug, str) or not slug:
+            raise HTTPError(400, "Falta room")
+        room_type = self._room(slug)
+        visitor = self.palace.visit_room(visitor_id, room_type, show=False)
+        response = _visitor_json(visitor)
+        response["content"] = f"/rooms/{room_type.name.lower()}"
+        response["etag"] = self.cache.rooms[room_type].etag
+        return 200, response
+    
+    def _sign_guestbook(self, payload: Dict) -> Tuple[int, Dict]:
+        visitor_id = payload.get("visitor_id")
+        if not isinstance(visitor_id, str) or not visitor_id:
+            raise HTTPError(400, "Falta visitor_id")
+        with contextlib.redirect_stdout(self._silence):
+            signature = self.palace.sign_guestbook(
+                visitor_id,
+                message=str(payload.get("message", "")),
+                favorite_room=str(payload.get("favorite_room", "")),
+                will_return=bool(payload.get("will_return", True))
+            )
+        self.guestbook.collect()
+        return 201, signature
+
+
+# ═══════════════════════════════════════════════════════════════════
+# FUNCIÓN PRINCIPAL
+# ═══════════════════════════════════════════════════════════════════
+
+async def serve(host: str, port: int, guestbook_path: str, hibernation_path: Optional[str]):
+    """Construir el palacio y servirlo hasta que se interrumpa"""
+    with contextlib.redirect_stdout(_Silence()):
+        palace = DigitalPalace(hibernation_path=hibernation_path)
+    server = PalaceServer(palace, host, port, guestbook_path)
+    await server.start()
+    print(f"🏛️  El Palacio Digital sirve en http://{server.host}:{server.port}", flush=True)
+    
+    # SIGTERM cierra igual que Ctrl+C: se guardan las firmas pendientes
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel
+        )
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        palace.close()
+
+
+def main():
+    """
+    Ejecutar el servidor del Palacio Digital
+    """
+    parser = argparse.ArgumentParser(description="Servidor HTTP del Palacio Digital")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--guestbook", default="guestbook.jsonl")
+    parser.add_argument("--hibernation", default=None,
+                        help="archivo sqlite de hibernación (por defecto, uno temporal)")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(serve(args.host, args.port, args.guestbook, args.hibernation))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n🌟 Las puertas del palacio se cierran. Hasta pronto.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()